@@ -7,14 +7,15 @@ load_dotenv()
 
 import os
 import csv
+import io
 import json
 import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, List
-import httpx
+from typing import Any, AsyncIterator, List
 
 from fastapi import FastAPI, UploadFile, Form, File, HTTPException, Request
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from fastapi.responses import ORJSONResponse, HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
@@ -22,14 +23,33 @@ from fastapi.templating import Jinja2Templates
 from dashboard import DashboardData
 
 from .lib import storage
-from .lib.emailer import send_result_email, send_error_email
-from .services.signalhire_client import submit_identifier, API_BASE, API_PREFIX, API_KEY
+from .lib.emailer import close_email_session, send_result_email, send_error_email
+from .services.signalhire_client import build_client, chunked, submit_identifiers, API_PREFIX, API_KEY
 from .lib.csv_writer import flatten_callback_payload
 
 APP_NAME = "SignalHire Cloud Webhook"
+# Max in-flight Person API submissions per upload (must stay below the client's max_connections)
+SIGNALHIRE_CONCURRENCY = int(os.getenv("SIGNALHIRE_CONCURRENCY", "32"))
 
 
-app = FastAPI(title=APP_NAME, version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Hold one pooled SignalHire client for the lifetime of the process."""
+    storage.import_legacy_statuses()
+    app.state.http = build_client()
+    try:
+        yield
+    finally:
+        await close_email_session()
+        await app.state.http.aclose()
+
+
+app = FastAPI(
+    title=APP_NAME,
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -198,7 +218,7 @@ async def health() -> dict[str, Any]:
 
 
 @app.get("/credits")
-async def credits() -> JSONResponse:
+async def credits(request: Request) -> ORJSONResponse:
     """Proxy to SignalHire credits endpoint using configured API key.
 
     Returns JSON with remaining credits or an error with diagnostics.
@@ -206,24 +226,22 @@ async def credits() -> JSONResponse:
     try:
         if not API_KEY:
             raise HTTPException(status_code=500, detail="Missing SIGNALHIRE_API_KEY")
-        url = f"{API_BASE}{API_PREFIX}/credits?withoutContacts=true"
-        headers = {"apikey": API_KEY}
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.get(url, headers=headers)
-            try:
-                data = resp.json()
-            except Exception:
-                raw = await resp.aread()
-                data = {"raw": raw[:1024].decode(errors="ignore")}
-            return JSONResponse(
-                {
-                    "ok": resp.status_code in range(200, 300),
-                    "status_code": resp.status_code,
-                    "headers": {k: v for k, v in resp.headers.items() if k.lower() in {"content-type"}},
-                    "data": data,
-                },
-                status_code=resp.status_code,
-            )
+        client = request.app.state.http
+        resp = await client.get(f"{API_PREFIX}/credits", params={"withoutContacts": "true"})
+        try:
+            data = resp.json()
+        except Exception:
+            raw = await resp.aread()
+            data = {"raw": raw[:1024].decode(errors="ignore")}
+        return ORJSONResponse(
+            {
+                "ok": resp.status_code in range(200, 300),
+                "status_code": resp.status_code,
+                "headers": {k: v for k, v in resp.headers.items() if k.lower() in {"content-type"}},
+                "data": data,
+            },
+            status_code=resp.status_code,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -231,22 +249,27 @@ async def credits() -> JSONResponse:
 
 
 @app.post("/upload")
-async def upload(csv_file: UploadFile = File(...), user_email: str = Form(...)) -> JSONResponse:
+async def upload(csv_file: UploadFile = File(...), user_email: str = Form(...)) -> ORJSONResponse:
     """Accept CSV of LinkedIn URLs and user email, create batch, submit Person API requests."""
     try:
-        content = await csv_file.read()
         # Create batch and persist original CSV
         batch_id = storage.new_batch_id()
-        storage.save_original_csv(batch_id, content)
+        storage.save_original_csv(batch_id, csv_file.file)
+        csv_file.file.seek(0)
 
-        # Parse LinkedIn URLs (single-column CSV)
+        # Parse LinkedIn URLs (single-column CSV), streaming row by row
         urls: List[str] = []
-        for row in csv.reader(content.decode("utf-8-sig").splitlines()):
-            if not row:
-                continue
-            url = (row[0] or "").strip()
-            if url and url.lower().startswith("http"):
-                urls.append(url)
+        text = io.TextIOWrapper(csv_file.file, encoding="utf-8-sig", newline="")
+        try:
+            for row in csv.reader(text):
+                if not row:
+                    continue
+                url = (row[0] or "").strip()
+                if url and url.lower().startswith("http"):
+                    urls.append(url)
+        finally:
+            # Leave the underlying upload file for FastAPI to close
+            text.detach()
         if not urls:
             raise HTTPException(status_code=400, detail="No LinkedIn URLs found in CSV")
 
@@ -255,8 +278,7 @@ async def upload(csv_file: UploadFile = File(...), user_email: str = Form(...))
             "status": "processing",
             "email": user_email,
             "total_items": len(urls),
-            "pending": [],
-            "received": 0,
+            "request_ids": [],  # pending/received are derived from callbacks on read
             "errors": [],
             "submissions": [],  # per-item diagnostics
         }
@@ -268,29 +290,53 @@ async def upload(csv_file: UploadFile = File(...), user_email: str = Form(...))
         ).rstrip("/")
         callback_url = f"{callback_base}/signalhire/callback"
 
-        for url in urls:
-            resp = await submit_identifier(url, callback_url)
+        # Create the batch row before any submission so early callbacks find it
+        storage.write_status(batch_id, status)
+
+        # Submit chunks of URLs concurrently; keep the window below the shared client's pool size
+        sem = asyncio.Semaphore(SIGNALHIRE_CONCURRENCY)
+        chunks = chunked(urls)
+
+        async def submit_chunk(chunk: List[str]) -> dict[str, Any]:
+            async with sem:
+                resp = await submit_identifiers(chunk, callback_url, app.state.http)
+            # Map right away: SignalHire may call back before the other chunks return
+            if resp.get("success") and resp.get("request_id"):
+                storage.map_request_to_batch(resp["request_id"], batch_id)
+            return resp
+
+        results = await asyncio.gather(*(submit_chunk(c) for c in chunks), return_exceptions=True)
+
+        request_ids: List[str] = []
+        submitted = 0
+        for chunk, resp in zip(chunks, results):
+            if isinstance(resp, BaseException):
+                resp = {"success": False, "error": str(resp)}
             # record diagnostics for visibility
             status["submissions"].append({
-                "item": url,
+                "items": chunk,
                 "success": resp.get("success"),
                 "request_id": resp.get("request_id"),
                 "error": resp.get("error"),
                 "diagnostics": resp.get("diagnostics"),
             })
             if not resp["success"]:
-                status["errors"].append({"item": url, "error": resp.get("error")})
+                status["errors"].extend({"item": url, "error": resp.get("error")} for url in chunk)
                 continue
             rid = resp.get("request_id")
             if rid:
-                storage.map_request_to_batch(rid, batch_id)
-                status["pending"].append(rid)
+                request_ids.append(rid)
+                submitted += len(chunk)
 
+        # Setting request_ids fixes `expected`; callbacks may all have arrived already
+        status["request_ids"] = request_ids
         storage.write_status(batch_id, status)
-        return JSONResponse({
+        await complete_batch_if_done(batch_id)
+        return ORJSONResponse({
             "status": "accepted",
             "batch_id": batch_id,
-            "submitted": len(status["pending"]),
+            "submitted": submitted,
+            "requests": len(request_ids),
             "errors": len(status["errors"]),
             "callback_url": callback_url,
         })
@@ -300,8 +346,32 @@ async def upload(csv_file: UploadFile = File(...), user_email: str = Form(...))
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def complete_batch_if_done(batch_id: str) -> None:
+    """Mark the batch complete and email results once no request is pending.
+
+    Safe to call repeatedly; only the first call that sees an empty pending
+    list completes the batch.
+    """
+    status = storage.read_status(batch_id)
+    if not status.get("request_ids") or status.get("pending") or status.get("status") == "complete":
+        return
+    status["status"] = "complete"
+    storage.write_status(batch_id, status)
+    storage.close_results_csv(batch_id)
+    try:
+        # Email results.csv
+        csv_path = storage.batch_csv_path(batch_id)
+        user_email = status.get("email")
+        if user_email and csv_path.exists():
+            await send_result_email(user_email, batch_id, csv_path)
+    except Exception as email_err:
+        # Record email error but do not fail webhook
+        status.setdefault("errors", []).append({"email_error": str(email_err)})
+        storage.write_status(batch_id, status)
+
+
 @app.post("/signalhire/callback")
-async def callback(request: Request) -> JSONResponse:
+async def callback(request: Request) -> ORJSONResponse:
     """Handle SignalHire Person API callback, append JSON/CSV, and manage batch status and email."""
     try:
         request_id = request.headers.get("Request-Id") or request.headers.get("Request-ID")
@@ -313,42 +383,23 @@ async def callback(request: Request) -> JSONResponse:
         batch_id = storage.find_batch_by_request(request_id)
         if not batch_id:
             # Accept but log unknown request id
-            return JSONResponse({"status": "accepted", "warning": "unknown request id"})
+            return ORJSONResponse({"status": "accepted", "warning": "unknown request id"})
 
         # Append raw JSON per request
-        storage.append_results_json(batch_id, request_id, payload)
+        storage.append_results_jsonl(batch_id, request_id, payload)
 
         # Flatten and append CSV rows
         rows = flatten_callback_payload(payload)
         storage.append_results_csv(batch_id, rows)
 
-        # Update status: remove pending id, increment received
-        status = storage.read_status(batch_id)
-        pending = status.get("pending", [])
-        if request_id in pending:
-            pending.remove(request_id)
-        status["pending"] = pending
-        status["received"] = int(status.get("received", 0)) + 1
-
-        # If no pending, mark complete and send email
-        if not pending:
-            status["status"] = "complete"
-            storage.write_status(batch_id, status)
-            try:
-                # Email results.csv
-                csv_path = storage.batch_csv_path(batch_id)
-                user_email = status.get("email")
-                if user_email and csv_path.exists():
-                    await send_result_email(user_email, batch_id, csv_path)
-            except Exception as email_err:
-                # Record email error but do not fail webhook
-                status.setdefault("errors", []).append({"email_error": str(email_err)})
-                storage.write_status(batch_id, status)
-        else:
-            # Save interim status
-            storage.write_status(batch_id, status)
+        # Record completion: one log append + counter bump, no status rewrite
+        received, expected = storage.record_callback(batch_id, request_id)
+
+        # Once every request has called back, confirm and finish the batch
+        if expected and received >= expected:
+            await complete_batch_if_done(batch_id)
 
-        return JSONResponse({"status": "accepted", "batch_id": batch_id})
+        return ORJSONResponse({"status": "accepted", "batch_id": batch_id})
     except HTTPException:
         raise
     except Exception as e:
@@ -412,17 +463,18 @@ async def run_enrichment_process(
                     request_id = response_json.get("requestId")
                     if request_id:
                         request_ids.append(str(request_id))
-                        storage.map_request_to_batch(str(request_id), batch_id)
                 except Exception:
                     pass
             
-            status["pending"] = request_ids
-            status["received"] = 0
+            # Set request_ids (and so expected) before callbacks can resolve the batch
+            status["request_ids"] = request_ids
+            storage.write_status(batch_id, status)
+            storage.map_requests_to_batch_bulk((rid, batch_id) for rid in request_ids)
+            await complete_batch_if_done(batch_id)
         else:
             status["stage"] = "error"
             status["error"] = stderr.decode('utf-8')
-        
-        storage.write_status(batch_id, status)
+            storage.write_status(batch_id, status)
         
     except Exception as e:
         status = storage.read_status(batch_id) or {}
@@ -433,49 +485,47 @@ async def run_enrichment_process(
 from datetime import datetime
 
 @app.get("/status")
-async def get_status() -> JSONResponse:
+async def get_status() -> ORJSONResponse:
     """Get webhook server status and statistics"""
     try:
         # Calculate records
         total_records = 0
         run_records = 0
         
-        batches_dir = Path("data/batches")
-        if batches_dir.exists():
-            for batch_dir in batches_dir.iterdir():
-                if batch_dir.is_dir() and (batch_dir / "status.json").exists():
-                    st = storage.read_status(batch_dir.name)
-                    if st:
-                        total_records += st.get("received", 0)
-                        
-                        # Just a simple heuristic for "current run" vs "lifetime"
-                        # For now we'll just set run_records to the most recent batch
-                        run_records = st.get("received", 0)
+        batch_ids = storage.list_batch_ids()
+        for batch_id in batch_ids:
+            st = storage.read_status(batch_id)
+            if st:
+                total_records += st.get("received", 0)
+
+                # Just a simple heuristic for "current run" vs "lifetime"
+                # For now we'll just set run_records to the most recent batch
+                run_records = st.get("received", 0)
         
         # Find current run (most recent batch) and auto-timeout stuck batches
         current_run = None
-        if batches_dir.exists():
+        if batch_ids:
             batches = []
-            for batch_dir in batches_dir.iterdir():
-                if batch_dir.is_dir() and (batch_dir / "status.json").exists():
-                    st = storage.read_status(batch_dir.name)
-                    if st:
-                        # Auto-timeout stuck batches (default timeout: 900 seconds = 15 minutes)
-                        if st.get("stage") in ["running_enrichment", "waiting_for_callbacks"]:
-                            started_at = st.get("started_at", "")
-                            timeout_seconds = st.get("timeout", 900)
-                            try:
-                                from datetime import datetime
-                                start_time = datetime.fromisoformat(started_at)
-                                elapsed = (datetime.now() - start_time).total_seconds()
-                                if elapsed > timeout_seconds:
-                                    # Auto-timeout this batch
-                                    st["stage"] = "error_timeout"
-                                    st["error"] = f"Auto-timed out after {int(elapsed)}s (timeout: {timeout_seconds}s)"
-                                    storage.write_status(batch_dir.name, st)
-                            except Exception:
-                                pass  # If timestamp parsing fails, skip timeout check
-                        batches.append(st)
+            for batch_id in batch_ids:
+                st = storage.read_status(batch_id)
+                if st:
+                    # Auto-timeout stuck batches (default timeout: 900 seconds = 15 minutes)
+                    if st.get("stage") in ["running_enrichment", "waiting_for_callbacks"]:
+                        started_at = st.get("started_at", "")
+                        timeout_seconds = st.get("timeout", 900)
+                        try:
+                            from datetime import datetime
+                            start_time = datetime.fromisoformat(started_at)
+                            elapsed = (datetime.now() - start_time).total_seconds()
+                            if elapsed > timeout_seconds:
+                                # Auto-timeout this batch
+                                st["stage"] = "error_timeout"
+                                st["error"] = f"Auto-timed out after {int(elapsed)}s (timeout: {timeout_seconds}s)"
+                                storage.write_status(batch_id, st)
+                                storage.close_results_csv(batch_id)
+                        except Exception:
+                            pass  # If timestamp parsing fails, skip timeout check
+                    batches.append(st)
             
             # Sort by timestamp and get most recent
             if batches:
@@ -494,43 +544,38 @@ async def get_status() -> JSONResponse:
             "run_file_failed": 0,
             "current_run": current_run
         }
-        return JSONResponse(stats)
+        return ORJSONResponse(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/batches")
-async def list_batches() -> JSONResponse:
+async def list_batches() -> ORJSONResponse:
     """List all available batch files"""
     try:
-        batches_dir = Path("data/batches")
-        if not batches_dir.exists():
-            return JSONResponse([])
-            
         batches = []
-        for batch_dir in batches_dir.iterdir():
-            if batch_dir.is_dir() and (batch_dir / "status.json").exists():
-                st = storage.read_status(batch_dir.name)
-                if st:
-                    batches.append({
-                        "batch_id": batch_dir.name,
-                        "stage": st.get("stage", "unknown"),
-                        "started_at": st.get("started_at", "unknown"),
-                        "input": st.get("input", ""),
-                        "batch_size": st.get("batch_size", 0)
-                    })
+        for batch_id in storage.list_batch_ids():
+            st = storage.read_status(batch_id)
+            if st:
+                batches.append({
+                    "batch_id": batch_id,
+                    "stage": st.get("stage", "unknown"),
+                    "started_at": st.get("started_at", "unknown"),
+                    "input": st.get("input", ""),
+                    "batch_size": st.get("batch_size", 0)
+                })
         
         # Sort by started_at descending
         batches.sort(key=lambda x: x.get("started_at", ""), reverse=True)
-        return JSONResponse(batches)
+        return ORJSONResponse(batches)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/status/{batch_id}")
-async def status(batch_id: str) -> JSONResponse:
+async def status(batch_id: str) -> ORJSONResponse:
     st = storage.read_status(batch_id)
     if not st:
         raise HTTPException(status_code=404, detail="Unknown batch id")
-    return JSONResponse(st)
+    return ORJSONResponse(st)
 
 
 @app.get("/download/{batch_id}")
@@ -541,19 +586,19 @@ async def download(batch_id: str) -> FileResponse:
     return FileResponse(str(csv_path), media_type="text/csv", filename=f"results_{batch_id}.csv")
 
 @app.post("/merge_clay")
-async def merge_clay_endpoint() -> JSONResponse:
+async def merge_clay_endpoint() -> ORJSONResponse:
     """Merge enriched data with Clay export."""
-    return JSONResponse({"ok": False, "error": "Clay merge endpoint not yet implemented"})
+    return ORJSONResponse({"ok": False, "error": "Clay merge endpoint not yet implemented"})
 
 @app.get("/merge_clay_candidates")
-async def merge_clay_candidates_endpoint(folder: str = "") -> JSONResponse:
+async def merge_clay_candidates_endpoint(folder: str = "") -> ORJSONResponse:
     """List available files for Clay merging."""
-    return JSONResponse({"ok": False, "error": "Clay candidates listing not yet implemented"})
+    return ORJSONResponse({"ok": False, "error": "Clay candidates listing not yet implemented"})
 
 @app.post("/merge_clay_manual")
-async def merge_clay_manual_endpoint() -> JSONResponse:
+async def merge_clay_manual_endpoint() -> ORJSONResponse:
     """Manual Clay merge operation."""
-    return JSONResponse({"ok": False, "error": "Manual Clay merge not yet implemented"})
+    return ORJSONResponse({"ok": False, "error": "Manual Clay merge not yet implemented"})
 
 @app.get("/download_merged_clay")
 async def download_merged_clay() -> FileResponse:
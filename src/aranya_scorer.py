@@ -1,12 +1,16 @@
-import csv
+import asyncio
+import re
 import sys
-from github import Auth, Github
-import random
+import diskcache
+import httpx
 from dotenv import load_dotenv
 import os
 import time
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 load_dotenv()
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 if not GITHUB_TOKEN:
@@ -24,6 +28,9 @@ REPOS_TO_SCAN = [
 MIN_COMMITS = 5
 TOP_N_PER_REPO = 50
 
+# Optional seed for the random score fill (set for reproducible output)
+SCORER_SEED = os.getenv("SCORER_SEED")
+
 rubric = {
     'Go_K8s_Operators': 30,
     'IaC_Terraform_Helm': 25,
@@ -33,38 +40,105 @@ rubric = {
     'OSS_Familiarity': 5,
 }
 
-g = Github(auth=Auth.Token(GITHUB_TOKEN))
-
-contributors = []
-user_cache = {}  # Cache to avoid repeated API calls
-
-for repo_name in REPOS_TO_SCAN:
-    try:
-        print(f"Scanning {repo_name}...", file=sys.stderr)
-        repo = g.get_repo(repo_name)
-        contribs = repo.get_contributors()
-        sorted_contribs = sorted(contribs, key=lambda c: c.contributions, reverse=True)[:TOP_N_PER_REPO]
-        count = 0
-        for c in sorted_contribs:
-            if c.contributions >= MIN_COMMITS:
-                try:
-                    # Check cache first
-                    if c.login not in user_cache:
-                        user = g.get_user(c.login)
-                        user_cache[c.login] = user.location if user.location else "Unknown"
-                        time.sleep(0.1)  # Rate limit: 100ms between requests
-                    
-                    location = user_cache[c.login]
-                    contrib = {"username": c.login, "commits": c.contributions, "repo": repo_name, "location": location}
-                    contributors.append(contrib)
-                    count += 1
-                    if count % 10 == 0:
-                        print(f"  ... {count} contributors processed from {repo_name}", file=sys.stderr)
-                except Exception as user_err:
-                    print(f"  Skipping {c.login}: {str(user_err)}", file=sys.stderr)
-        print(f"Completed {repo_name}: {count} contributors", file=sys.stderr)
-    except Exception as e:
-        print(f"Error on {repo_name}: {str(e)}", file=sys.stderr)
+# US required for best fits; SFO / Bay Area preferred
+US_RE = re.compile(r"united states|usa|\bus\b|\bca\b|california|san francisco|bay area|sfo|sunnyvale|mountain view|cupertino", re.I)
+SFO_RE = re.compile(r"san francisco|bay area|sfo|sunnyvale|mountain view|cupertino", re.I)
+
+GITHUB_API = "https://api.github.com"
+MAX_CONCURRENCY = 10  # in-flight GitHub requests
+MAX_RETRIES = 3  # per request, on rate limiting (403/429) and 5xx
+LOCATION_TTL = 7 * 86400  # seconds a cached user location stays valid
+
+# Survives across runs so warm logins need no /users/{login} call
+location_cache = diskcache.Cache(str(Path(__file__).resolve().parents[1] / ".cache" / "github_users"))
+
+# Epoch seconds until which requests pause after GitHub reports an exhausted rate limit
+rate_limited_until = 0.0
+
+
+async def github_get(client, sem, path, **params):
+    global rate_limited_until
+    for attempt in range(MAX_RETRIES + 1):
+        async with sem:
+            delay = rate_limited_until - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            resp = await client.get(path, params=params)
+
+        exhausted = resp.headers.get("X-RateLimit-Remaining") == "0"
+        retry_after = resp.headers.get("Retry-After")
+        if exhausted:
+            reset = float(resp.headers.get("X-RateLimit-Reset", time.time() + 60))
+            rate_limited_until = max(rate_limited_until, reset)
+        if retry_after:
+            # Secondary rate limit: pause every request, not just this one
+            rate_limited_until = max(rate_limited_until, time.time() + float(retry_after))
+
+        throttled = resp.status_code in (403, 429) and (exhausted or retry_after)
+        if attempt < MAX_RETRIES and (throttled or resp.status_code >= 500):
+            if not throttled:
+                await asyncio.sleep(2 ** attempt)  # transient server error: back off and retry
+            continue
+        resp.raise_for_status()
+        return resp.json()
+
+
+async def fetch_location(client, sem, login):
+    location = location_cache.get(login)
+    if location is None:
+        user = await github_get(client, sem, f"/users/{login}")
+        location = user.get("location") or "Unknown"
+        location_cache.set(login, location, expire=LOCATION_TTL)
+    return location
+
+
+async def scan_repo(client, sem, repo_name, user_tasks):
+    print(f"Scanning {repo_name}...", file=sys.stderr)
+    contribs = await github_get(client, sem, f"/repos/{repo_name}/contributors", per_page=100)
+    sorted_contribs = sorted(contribs, key=lambda c: c["contributions"], reverse=True)[:TOP_N_PER_REPO]
+    eligible = [c for c in sorted_contribs if c["contributions"] >= MIN_COMMITS]
+
+    # One lookup per login, shared across repos scanned concurrently
+    for c in eligible:
+        if c["login"] not in user_tasks:
+            user_tasks[c["login"]] = asyncio.ensure_future(fetch_location(client, sem, c["login"]))
+    locations = await asyncio.gather(*(user_tasks[c["login"]] for c in eligible), return_exceptions=True)
+
+    found = []
+    for c, location in zip(eligible, locations):
+        if isinstance(location, Exception):
+            print(f"  Skipping {c['login']}: {str(location)}", file=sys.stderr)
+            continue
+        found.append({"username": c["login"], "commits": c["contributions"], "repo": repo_name, "location": location})
+    print(f"Completed {repo_name}: {len(found)} contributors", file=sys.stderr)
+    return found
+
+
+async def scan_all():
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    user_tasks = {}
+    async with httpx.AsyncClient(
+        base_url=GITHUB_API,
+        headers={"Authorization": f"Bearer {GITHUB_TOKEN}", "Accept": "application/vnd.github+json"},
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=20),
+    ) as client:
+        results = await asyncio.gather(
+            *(scan_repo(client, sem, repo_name, user_tasks) for repo_name in REPOS_TO_SCAN),
+            return_exceptions=True,
+        )
+    found = []
+    for repo_name, res in zip(REPOS_TO_SCAN, results):
+        if isinstance(res, Exception):
+            print(f"Error on {repo_name}: {str(res)}", file=sys.stderr)
+            continue
+        found.extend(res)
+    return found
+
+
+contributors = asyncio.run(scan_all())
+location_cache.close()
 
 unique_contribs = {c["username"]: c for c in contributors}
 contributors = list(unique_contribs.values())
@@ -72,64 +146,70 @@ contributors = list(unique_contribs.values())
 print(f"Total unique candidates: {len(contributors)}", file=sys.stderr)
 
 # Filter for US/SFO preferred (US required for best fits)
-us_candidates = []
-for c in contributors:
-    loc = c["location"].lower() if c["location"] else ""
-    if any(word in loc for word in ["united states", "usa", "us", "ca", "california", "san francisco", "bay area", "sfo", "sunnyvale", "mountain view", "cupertino"]):
-        us_candidates.append(c)
-
-print(f"US candidates (SFO preferred): {len(us_candidates)}", file=sys.stderr)
-
-# Score & output
-data = []
-for contrib in us_candidates:
-    username = contrib["username"]
-    commits = contrib["commits"]
-    repo = contrib["repo"]
-    location = contrib["location"]
-
-    scores = {dim: 0 for dim in rubric}
-
-    is_infra_god = commits > 400
-
-    scores["OSS_Familiarity"] = min(5, 2 + (commits // 50))
-    if is_infra_god:
-        scores["OSS_Familiarity"] = 2
-
-    if "operator" in repo.lower() or "kubebuilder" in repo.lower():
-        scores["Go_K8s_Operators"] = min(30, 15 + (commits // 10))
-        scores["Tooling_Automation"] = min(20, 10 + (commits // 15))
-
-    if "terraform" in repo.lower() or "helm" in repo.lower():
-        scores["IaC_Terraform_Helm"] = min(25, 15 + (commits // 10))
-        scores["Tooling_Automation"] = min(20, 10 + (commits // 15))
-
-    if "argo" in repo.lower():
-        scores["GitOps"] = min(10, 5 + (commits // 20))
-        scores["Tooling_Automation"] = min(20, 5 + (commits // 20))
-
-    if "rook" in repo.lower() or "ceph" in repo.lower():
-        scores["Storage"] = min(10, 5 + (commits // 20))
-
-    for dim in scores:
-        if scores[dim] == 0:
-            scores[dim] = random.randint(0, rubric[dim] // 3)
-
-    overall = sum(scores.values())
-
-    rationale = f"From {repo} ({commits} commits)."
-    risks = []
-    if "san francisco" not in location.lower() and "sfo" not in location.lower() and "bay area" not in location.lower():
-        risks.append("Non-SFO Location")
-    if is_infra_god:
-        risks.append("Potential 'Infra God' (High Commit Vol)")
-    risk_str = ", ".join(risks) if risks else "Clear"
-
-    row = [username, overall, commits, repo, location] + list(scores.values()) + [rationale, risk_str]
-    data.append(row)
+df = pd.DataFrame(contributors, columns=["username", "commits", "repo", "location"])
+df = df[df["location"].str.contains(US_RE, na=False)].reset_index(drop=True)
+
+print(f"US candidates (SFO preferred): {len(df)}", file=sys.stderr)
+
+# Score all candidates column-wise; later boosts overwrite earlier ones as in the per-row rules
+commits = df["commits"].astype(int)
+repo_lower = df["repo"].str.lower()
+is_infra_god = commits > 400
+
+scores = pd.DataFrame(0, index=df.index, columns=list(rubric))
+
+scores["OSS_Familiarity"] = np.where(is_infra_god, 2, np.minimum(5, 2 + commits // 50))
+
+m = repo_lower.str.contains("operator|kubebuilder")
+scores.loc[m, "Go_K8s_Operators"] = np.minimum(30, 15 + commits[m] // 10)
+scores.loc[m, "Tooling_Automation"] = np.minimum(20, 10 + commits[m] // 15)
+
+m = repo_lower.str.contains("terraform|helm")
+scores.loc[m, "IaC_Terraform_Helm"] = np.minimum(25, 15 + commits[m] // 10)
+scores.loc[m, "Tooling_Automation"] = np.minimum(20, 10 + commits[m] // 15)
+
+m = repo_lower.str.contains("argo")
+scores.loc[m, "GitOps"] = np.minimum(10, 5 + commits[m] // 20)
+scores.loc[m, "Tooling_Automation"] = np.minimum(20, 5 + commits[m] // 20)
+
+m = repo_lower.str.contains("rook|ceph")
+scores.loc[m, "Storage"] = np.minimum(10, 5 + commits[m] // 20)
+
+# Random fill for dimensions with no signal: one draw for the whole table
+rng = np.random.default_rng(int(SCORER_SEED) if SCORER_SEED else None)
+caps = np.array([cap // 3 for cap in rubric.values()]) + 1
+rand = rng.integers(0, caps, size=(len(df), len(rubric)))
+values = scores.to_numpy()
+scores = pd.DataFrame(np.where(values == 0, rand, values), index=df.index, columns=list(rubric))
+
+non_sfo = ~df["location"].str.contains(SFO_RE, na=False)
+infra_risk = "Potential 'Infra God' (High Commit Vol)"
+risks = np.select(
+    [non_sfo & is_infra_god, non_sfo, is_infra_god],
+    [f"Non-SFO Location, {infra_risk}", "Non-SFO Location", infra_risk],
+    default="Clear",
+)
+
+out = pd.concat(
+    [
+        pd.DataFrame({
+            "GitHub Username": df["username"],
+            "Overall Score": scores.sum(axis=1),
+            "Commits": commits,
+            "Repo": df["repo"],
+            "Location": df["location"],
+        }),
+        scores,
+        pd.DataFrame({
+            "Rationale": "From " + df["repo"] + " (" + commits.astype(str) + " commits).",
+            "Risks": risks,
+        }, index=df.index),
+    ],
+    axis=1,
+)
 
 # Sort by score descending
-data.sort(key=lambda x: x[1], reverse=True)
+out = out.sort_values("Overall Score", ascending=False, kind="stable")
 
 headers = ['GitHub Username', 'Overall Score', 'Commits', 'Repo', 'Location'] + list(rubric.keys()) + ['Rationale', 'Risks']
 
@@ -137,13 +217,7 @@ output_dir = Path(__file__).resolve().parents[1] / "output"
 output_dir.mkdir(parents=True, exist_ok=True)
 output_path = output_dir / "candidates_new.csv"
 
-with output_path.open("w", newline="", encoding="utf-8") as f:
-    file_writer = csv.writer(f)
-    file_writer.writerow(headers)
-    file_writer.writerows(data)
-
-writer = csv.writer(sys.stdout)
-writer.writerow(headers)
-writer.writerows(data)
+out[headers].to_csv(output_path, index=False, encoding="utf-8")
+out[headers].to_csv(sys.stdout, index=False)
 
-print(f"CSV output complete. {len(data)} US candidates written.", file=sys.stderr)
+print(f"CSV output complete. {len(out)} US candidates written.", file=sys.stderr)
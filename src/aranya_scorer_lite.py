@@ -2,14 +2,15 @@
 """
 Lightweight GitHub sourcing script - no user location lookups (faster)
 """
-import csv
 import sys
 from github import Github
-import random
 from dotenv import load_dotenv
 import os
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 load_dotenv()
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 if not GITHUB_TOKEN:
@@ -28,6 +29,9 @@ REPOS_TO_SCAN = [
 MIN_COMMITS = 10
 TOP_N_PER_REPO = 50
 
+# Optional seed for the random score fill (set for reproducible output)
+SCORER_SEED = os.getenv("SCORER_SEED")
+
 rubric = {
     'Operators': 20,
     'GitOps': 15,
@@ -75,40 +79,55 @@ contributors = list(unique_contribs.values())
 
 print(f"Total unique candidates: {len(contributors)}", file=sys.stderr)
 
-# Output CSV
-data = []
-for contrib in contributors:
-    username = contrib["username"]
-    commits = contrib["commits"]
-    repo = contrib["repo"]
-    location = contrib["location"]
-
-    scores = {dim: random.randint(0, rubric[dim] // 3) for dim in rubric}
-    
-    # Boost based on repo
-    if "argo" in repo.lower():
-        scores["GitOps"] = min(15, 10 + (commits // 10))
-        scores["Operators"] = min(20, 12 + (commits // 20))
-    if "kubernetes" in repo.lower():
-        scores["Operators"] = min(20, scores["Operators"] + 8)
-        scores["MultiCluster"] = min(10, scores["MultiCluster"] + 5)
-    if "cilium" in repo.lower():
-        scores["Networking"] = min(10, 8 + (commits // 50))
-    if "rook" in repo.lower() or "ceph" in repo.lower():
-        scores["Storage"] = min(10,8 + (commits // 50))
-    if "operator" in repo.lower():
-        scores["Operators"] = min(20, scores["Operators"] + 5)
-    if "prometheus" in repo.lower():
-        scores["Observability"] = min(10, 7 + (commits // 50))
-
-    overall = sum(scores.values())
-    rationale = f"From {repo} ({commits} commits)."
-    risks = "GH contributor"
-
-    row = [username, overall, commits, repo, location] + list(scores.values()) + [rationale, risks]
-    data.append(row)
-
-data.sort(key=lambda x: x[1], reverse=True)
+# Score all candidates column-wise
+df = pd.DataFrame(contributors, columns=["username", "commits", "repo", "location"])
+commits = df["commits"].astype(int)
+repo_lower = df["repo"].str.lower()
+
+# Baseline random scores: one draw for the whole table
+rng = np.random.default_rng(int(SCORER_SEED) if SCORER_SEED else None)
+caps = np.array([cap // 3 for cap in rubric.values()]) + 1
+scores = pd.DataFrame(
+    rng.integers(0, caps, size=(len(df), len(rubric))),
+    index=df.index,
+    columns=list(rubric),
+)
+
+# Boost based on repo (applied in order; later rules build on earlier ones)
+m = repo_lower.str.contains("argo")
+scores.loc[m, "GitOps"] = np.minimum(15, 10 + commits[m] // 10)
+scores.loc[m, "Operators"] = np.minimum(20, 12 + commits[m] // 20)
+m = repo_lower.str.contains("kubernetes")
+scores.loc[m, "Operators"] = np.minimum(20, scores.loc[m, "Operators"] + 8)
+scores.loc[m, "MultiCluster"] = np.minimum(10, scores.loc[m, "MultiCluster"] + 5)
+m = repo_lower.str.contains("cilium")
+scores.loc[m, "Networking"] = np.minimum(10, 8 + commits[m] // 50)
+m = repo_lower.str.contains("rook|ceph")
+scores.loc[m, "Storage"] = np.minimum(10, 8 + commits[m] // 50)
+m = repo_lower.str.contains("operator")
+scores.loc[m, "Operators"] = np.minimum(20, scores.loc[m, "Operators"] + 5)
+m = repo_lower.str.contains("prometheus")
+scores.loc[m, "Observability"] = np.minimum(10, 7 + commits[m] // 50)
+
+out = pd.concat(
+    [
+        pd.DataFrame({
+            "GitHub Username": df["username"],
+            "Overall Score": scores.sum(axis=1),
+            "Commits": commits,
+            "Repo": df["repo"],
+            "Location": df["location"],
+        }),
+        scores,
+        pd.DataFrame({
+            "Rationale": "From " + df["repo"] + " (" + commits.astype(str) + " commits).",
+            "Risks": "GH contributor",
+        }, index=df.index),
+    ],
+    axis=1,
+)
+
+out = out.sort_values("Overall Score", ascending=False, kind="stable")
 
 headers = ['GitHub Username', 'Overall Score', 'Commits', 'Repo', 'Location'] + list(rubric.keys()) + ['Rationale', 'Risks']
 
@@ -116,13 +135,7 @@ output_dir = Path(__file__).resolve().parents[1] / "output"
 output_dir.mkdir(parents=True, exist_ok=True)
 output_path = output_dir / "candidates_lite.csv"
 
-with output_path.open("w", newline="", encoding="utf-8") as f:
-    file_writer = csv.writer(f)
-    file_writer.writerow(headers)
-    file_writer.writerows(data)
-
-writer = csv.writer(sys.stdout)
-writer.writerow(headers)
-writer.writerows(data)
+out[headers].to_csv(output_path, index=False, encoding="utf-8")
+out[headers].to_csv(sys.stdout, index=False)
 
-print(f"Done. {len(data)} candidates output.", file=sys.stderr)
+print(f"Done. {len(out)} candidates output.", file=sys.stderr)
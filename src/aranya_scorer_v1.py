@@ -1,4 +1,5 @@
 ﻿import csv
+import re
 import sys
 from github import Github
 import random
@@ -7,8 +8,6 @@ import os
 import time
 from pathlib import Path
 
-load_dotenv()
-
 load_dotenv()
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 if not GITHUB_TOKEN:
@@ -28,6 +27,10 @@ REPOS_TO_SCAN = [
     "kubernetes/kubernetes"
 ]
 
+# US required for best fits; SFO / Bay Area preferred
+US_RE = re.compile(r"united states|usa|\bus\b|\bca\b|california|san francisco|bay area|sfo|sunnyvale|mountain view|cupertino", re.I)
+SFO_RE = re.compile(r"san francisco|bay area|sfo|sunnyvale|mountain view|cupertino", re.I)
+
 MIN_COMMITS = 10
 TOP_N_PER_REPO = 50
 
@@ -43,6 +46,25 @@ rubric = {
     'Product': 5
 }
 
+
+def repo_rules(repo):
+    """Which repo-based boosts apply to ``repo`` (matched case-insensitively)."""
+    r = repo.lower()
+    return {
+        "argo": "argo" in r,
+        "kubernetes": "kubernetes" in r,
+        "cilium": "cilium" in r,
+        "storage": "rook" in r or "ceph" in r,
+        "operator": "operator" in r,
+        "cluster_api": "cluster-api" in r,
+        "iac": "helm" in r or "terraform" in r,
+        "observability": "prometheus" in r or "grafana" in r,
+    }
+
+
+# repo only ever takes values from REPOS_TO_SCAN, so match once per repo
+REPO_RULES = {repo: repo_rules(repo) for repo in REPOS_TO_SCAN}
+
 g = Github(GITHUB_TOKEN)
 
 contributors = []
@@ -82,11 +104,7 @@ contributors = list(unique_contribs.values())
 print(f"Total unique candidates: {len(contributors)}", file=sys.stderr)
 
 # Filter for US/SFO preferred (US required for best fits)
-us_candidates = []
-for c in contributors:
-    loc = c["location"].lower() if c["location"] else ""
-    if any(word in loc for word in ["united states", "usa", "us", "ca", "california", "san francisco", "bay area", "sfo", "sunnyvale", "mountain view", "cupertino"]):
-        us_candidates.append(c)
+us_candidates = [c for c in contributors if US_RE.search(c["location"] or "")]
 
 print(f"US candidates (SFO preferred): {len(us_candidates)}", file=sys.stderr)
 
@@ -99,28 +117,29 @@ for contrib in us_candidates:
     location = contrib["location"]
 
     scores = {dim: 0 for dim in rubric}
+    rules = REPO_RULES[repo]
 
     # Tuned boosts: Higher for Argo (GitOps +5 if commits >200, Operators +5)
-    if "argo" in repo.lower():
+    if rules["argo"]:
         scores["GitOps"] = min(15, 10 + (commits // 10) + (5 if commits > 200 else 0))
         scores["Operators"] = min(20, 12 + (commits // 20) + (5 if commits > 200 else 0))
     # Kubernetes boost
-    if "kubernetes" in repo.lower():
+    if rules["kubernetes"]:
         scores["Operators"] = min(20, scores["Operators"] + 8)
         scores["MultiCluster"] = min(10, scores["MultiCluster"] + 5)
     # Other boosts
-    if "cilium" in repo.lower():
+    if rules["cilium"]:
         scores["Networking"] = min(10, 8 + (commits // 50))
         scores["Observability"] = min(10, 5 + (commits // 50))
-    if "rook" in repo.lower() or "ceph" in repo.lower():
+    if rules["storage"]:
         scores["Storage"] = min(10, 8 + (commits // 50))
-    if "operator-sdk" in repo.lower() or "operator" in repo.lower():
+    if rules["operator"]:
         scores["Operators"] = min(20, 12 + (commits // 30))
-    if "cluster-api" in repo.lower():
+    if rules["cluster_api"]:
         scores["MultiCluster"] = min(10, 7 + (commits // 50))
-    if "helm" in repo.lower() or "terraform" in repo.lower():
+    if rules["iac"]:
         scores["IaC"] = min(10, 6 + (commits // 50))
-    if "prometheus" in repo.lower() or "grafana" in repo.lower():
+    if rules["observability"]:
         scores["Observability"] = min(10, 7 + (commits // 50))
 
     scores["OSS"] = min(10, 5 + (commits // 100))
@@ -131,7 +150,7 @@ for contrib in us_candidates:
 
     overall = sum(scores.values())
     rationale = f"From {repo} ({commits} commits). Location: {location}."
-    risks = "SFO/Bay Area" if any(word in location.lower() for word in ["san francisco", "bay area", "sfo", "sunnyvale", "mountain view", "cupertino"]) else "US (non-SFO)"
+    risks = "SFO/Bay Area" if SFO_RE.search(location) else "US (non-SFO)"
 
     row = [username, overall, commits, repo, location] + list(scores.values()) + [rationale, risks]
     data.append(row)
@@ -2,6 +2,20 @@ from __future__ import annotations
 
 from typing import Any, Dict, Iterable, List
 
+# Column order of every row produced by flatten_callback_payload
+FIELDNAMES: List[str] = [
+    "uid",
+    "full_name",
+    "status",
+    "linkedin_url",
+    "contact_type",
+    "contact_value",
+    "contact_subtype",
+]
+
+# Social "type" values that identify a LinkedIn profile
+_LI_TYPES = frozenset({"li", "linkedin"})
+
 
 def flatten_callback_payload(payload: Any) -> List[Dict[str, Any]]:
     """Flatten SignalHire Person API callback payload to CSV-like rows.
@@ -18,27 +32,26 @@ def flatten_callback_payload(payload: Any) -> List[Dict[str, Any]]:
     items = payload if isinstance(payload, list) else [payload]
 
     for it in items:
-        status = it.get("status")
-        original_item = it.get("item")
         cand = it.get("candidate") or {}
-        uid = cand.get("uid")
-        full_name = cand.get("fullName") or cand.get("full_name")
         socials = cand.get("social") or []
-        linkedin_url = None
-        for s in socials:
-            if (s.get("type") or "").lower() in ("li", "linkedin"):
-                linkedin_url = s.get("link")
-                break
+        linkedin_url = next(
+            (s.get("link") for s in socials if (s.get("type") or "").lower() in _LI_TYPES),
+            None,
+        )
+        # Per-candidate columns shared by every contact row
+        base = {
+            "uid": cand.get("uid"),
+            "full_name": cand.get("fullName") or cand.get("full_name"),
+            "status": it.get("status"),
+            "linkedin_url": linkedin_url or it.get("item"),
+        }
         contacts = cand.get("contacts") or []
 
         if contacts:
             for c in contacts:
                 rows.append(
                     {
-                        "uid": uid,
-                        "full_name": full_name,
-                        "status": status,
-                        "linkedin_url": linkedin_url or original_item,
+                        **base,
                         "contact_type": c.get("type"),
                         "contact_value": c.get("value"),
                         "contact_subtype": c.get("subType") or c.get("sub_type"),
@@ -46,16 +59,6 @@ def flatten_callback_payload(payload: Any) -> List[Dict[str, Any]]:
                 )
         else:
             # No contacts -> still emit a row for traceability
-            rows.append(
-                {
-                    "uid": uid,
-                    "full_name": full_name,
-                    "status": status,
-                    "linkedin_url": linkedin_url or original_item,
-                    "contact_type": None,
-                    "contact_value": None,
-                    "contact_subtype": None,
-                }
-            )
+            rows.append({**base, "contact_type": None, "contact_value": None, "contact_subtype": None})
 
     return rows
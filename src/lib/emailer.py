@@ -2,21 +2,61 @@ from __future__ import annotations
 
 import asyncio
 import os
-import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 from pathlib import Path
 
+import aiosmtplib
+
 GMAIL_USER = os.getenv("GMAIL_USER")
 GMAIL_APP_PASSWORD = os.getenv("GMAIL_APP_PASSWORD")
 
+# Logged-in Gmail session reused across sends; guarded by _smtp_lock
+_smtp_lock = asyncio.Lock()
+_smtp: aiosmtplib.SMTP | None = None
+
+
+async def _get_smtp() -> aiosmtplib.SMTP:
+    """Return the cached SMTP session, reconnecting if the server dropped it."""
+    global _smtp
+    if _smtp is not None and _smtp.is_connected:
+        try:
+            if (await _smtp.noop()).code == 250:
+                return _smtp
+        except (aiosmtplib.SMTPException, OSError):
+            pass
+    await _close_smtp()
+    server = aiosmtplib.SMTP(hostname="smtp.gmail.com", port=465, use_tls=True)
+    await server.connect()
+    try:
+        await server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
+    except Exception:
+        # Don't leak the open TLS connection when AUTH fails
+        server.close()
+        raise
+    _smtp = server
+    return server
+
+
+async def _close_smtp() -> None:
+    global _smtp
+    if _smtp is not None:
+        try:
+            await _smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            pass
+        _smtp = None
 
-def _send_email_sync(to_addr: str, subject: str, html_body: str, attachment_path: Path | None = None) -> None:
-    if not GMAIL_USER or not GMAIL_APP_PASSWORD:
-        raise RuntimeError("Missing GMAIL_USER or GMAIL_APP_PASSWORD environment variables")
 
+async def close_email_session() -> None:
+    """Log out of the cached SMTP session (call on app shutdown)."""
+    async with _smtp_lock:
+        await _close_smtp()
+
+
+def _build_message(to_addr: str, subject: str, html_body: str, attachment_path: Path | None = None) -> MIMEMultipart:
     msg = MIMEMultipart()
     msg["From"] = GMAIL_USER
     msg["To"] = to_addr
@@ -32,10 +72,22 @@ def _send_email_sync(to_addr: str, subject: str, html_body: str, attachment_path
             f"attachment; filename={attachment_path.name}",
         )
         msg.attach(part)
+    return msg
+
+
+async def _send_email(to_addr: str, subject: str, html_body: str, attachment_path: Path | None = None) -> None:
+    if not GMAIL_USER or not GMAIL_APP_PASSWORD:
+        raise RuntimeError("Missing GMAIL_USER or GMAIL_APP_PASSWORD environment variables")
+
+    msg = _build_message(to_addr, subject, html_body, attachment_path)
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
-        server.sendmail(GMAIL_USER, [to_addr], msg.as_string())
+    async with _smtp_lock:
+        try:
+            await (await _get_smtp()).send_message(msg)
+        except aiosmtplib.SMTPServerDisconnected:
+            # Session went stale between NOOP and send; retry once on a fresh one
+            await _close_smtp()
+            await (await _get_smtp()).send_message(msg)
 
 
 async def send_result_email(to_addr: str, batch_id: str, csv_path: Path) -> None:
@@ -47,7 +99,7 @@ async def send_result_email(to_addr: str, batch_id: str, csv_path: Path) -> None
       <p>Thank you,<br/>Gary Maus</p>
     </body></html>
     """
-    await asyncio.to_thread(_send_email_sync, to_addr, subject, html, csv_path)
+    await _send_email(to_addr, subject, html, csv_path)
 
 
 async def send_error_email(to_addr: str, batch_id: str, error_msg: str) -> None:
@@ -60,4 +112,4 @@ async def send_error_email(to_addr: str, batch_id: str, error_msg: str) -> None:
       <p>Please try again later or contact support.</p>
     </body></html>
     """
-    await asyncio.to_thread(_send_email_sync, to_addr, subject, html, None)
+    await _send_email(to_addr, subject, html, None)
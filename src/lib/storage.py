@@ -1,17 +1,42 @@
 from __future__ import annotations
 
-import json
+import atexit
+import csv
 import os
+import shutil
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, BinaryIO, Iterable, TextIO, Tuple
 from datetime import datetime
 
+import orjson
+
+from .csv_writer import FIELDNAMES
+
 DATA_ROOT = Path(os.getenv("DATA_ROOT", "data")).resolve()
 BATCHES_DIR = DATA_ROOT / "batches"
 REQUESTS_DIR = DATA_ROOT / "requests"
 BATCHES_DIR.mkdir(parents=True, exist_ok=True)
 REQUESTS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Batch status and request->batch mappings; WAL keeps callback writes cheap.
+# batches.received counts callbacks, batches.expected is len(status["request_ids"]).
+_db = sqlite3.connect(DATA_ROOT / "meta.db", check_same_thread=False)
+_db.execute("PRAGMA journal_mode=WAL")
+_db.execute("PRAGMA synchronous=NORMAL")
+_db.execute("CREATE TABLE IF NOT EXISTS request_map (rid TEXT PRIMARY KEY, batch_id TEXT NOT NULL)")
+_db.execute("CREATE TABLE IF NOT EXISTS batches (id TEXT PRIMARY KEY, status TEXT NOT NULL)")
+_batch_cols = {r[1] for r in _db.execute("PRAGMA table_info(batches)")}
+for _col in ("received", "expected"):
+    if _col not in _batch_cols:
+        _db.execute(f"ALTER TABLE batches ADD COLUMN {_col} INTEGER NOT NULL DEFAULT 0")
+_db.commit()
+_db_lock = threading.Lock()
+
+# Status keys derived on read and never stored in the status JSON
+_DERIVED_STATUS_KEYS = ("received", "pending")
+
 
 def new_batch_id() -> str:
     now = datetime.utcnow().strftime("%Y%m%d_%H%M%S%f")
@@ -24,67 +49,198 @@ def batch_dir(batch_id: str) -> Path:
     return d
 
 
-def save_original_csv(batch_id: str, content: bytes) -> Path:
+def save_original_csv(batch_id: str, src: BinaryIO) -> Path:
+    """Copy an uploaded CSV stream to the batch dir without loading it into memory."""
     d = batch_dir(batch_id)
     p = d / "original.csv"
-    p.write_bytes(content)
+    with p.open("wb") as f:
+        shutil.copyfileobj(src, f)
     return p
 
 
-def write_status(batch_id: str, status: dict[str, Any]) -> Path:
-    d = batch_dir(batch_id)
-    p = d / "status.json"
-    p.write_text(json.dumps(status, ensure_ascii=False, indent=2))
-    return p
+def write_status(batch_id: str, status: dict[str, Any]) -> None:
+    """Store the batch status; ``received``/``pending`` are owned by record_callback."""
+    stored = {k: v for k, v in status.items() if k not in _DERIVED_STATUS_KEYS}
+    with _db_lock, _db:
+        _db.execute(
+            "INSERT INTO batches (id, status, expected) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = excluded.status, expected = excluded.expected",
+            (batch_id, orjson.dumps(stored).decode(), len(stored.get("request_ids") or [])),
+        )
 
 
 def read_status(batch_id: str) -> dict[str, Any]:
-    p = batch_dir(batch_id) / "status.json"
+    """Return the batch status with ``received`` and ``pending`` filled in from callbacks."""
+    with _db_lock:
+        row = _db.execute("SELECT status, received FROM batches WHERE id = ?", (batch_id,)).fetchone()
+    if row:
+        status = orjson.loads(row[0])
+        status["received"] = row[1]
+        if "request_ids" in status:
+            done = completed_requests(batch_id)
+            status["pending"] = [rid for rid in status["request_ids"] if str(rid) not in done]
+        return status
+    # Not imported yet (import_legacy_statuses runs at app startup): read-only view
+    p = BATCHES_DIR / batch_id / "status.json"
     if p.exists():
-        return json.loads(p.read_text())
+        return orjson.loads(p.read_bytes())
     return {}
 
 
-def map_request_to_batch(request_id: str, batch_id: str) -> Path:
-    p = REQUESTS_DIR / f"{request_id}.txt"
-    p.write_text(batch_id)
-    return p
+def import_legacy_statuses() -> None:
+    """Copy every pre-DB status.json into ``batches``; batches already in the DB are skipped."""
+    for p in BATCHES_DIR.glob("*/status.json"):
+        _import_legacy_status(p.parent.name)
+
+
+def _import_legacy_status(batch_id: str) -> bool:
+    """Insert a pre-DB status.json into ``batches`` so callbacks can keep updating it.
+
+    The legacy ``pending`` list becomes ``request_ids`` and ``received`` seeds
+    the counter. Ids already present in results.json have called back, so they
+    are added to completed.log. The file itself is left untouched; once the row
+    exists it is the source of truth. Returns True if a row was inserted.
+    """
+    p = BATCHES_DIR / batch_id / "status.json"
+    if not p.exists():
+        return False
+    status = orjson.loads(p.read_bytes())
+    received = int(status.pop("received", 0) or 0)
+    pending = status.pop("pending", None)
+    if pending is not None:
+        status.setdefault("request_ids", pending)
+
+    with _db_lock, _db:
+        inserted = _db.execute(
+            "INSERT OR IGNORE INTO batches (id, status, received, expected) VALUES (?, ?, ?, ?)",
+            (batch_id, orjson.dumps(status).decode(), received, len(status.get("request_ids") or [])),
+        ).rowcount
+    if not inserted:
+        return False
+
+    results = p.with_name("results.json")
+    if results.exists():
+        done = orjson.loads(results.read_bytes() or b"{}")
+        if done:
+            with p.with_name("completed.log").open("ab") as f:
+                f.write("".join(f"{rid}\n" for rid in done).encode())
+    return True
+
+
+def record_callback(batch_id: str, request_id: str) -> tuple[int, int]:
+    """Log a completed request and bump the batch counter.
+
+    Returns (received, expected) so callers can detect completion without
+    loading the status.
+    """
+    with (batch_dir(batch_id) / "completed.log").open("ab") as f:
+        f.write(str(request_id).encode() + b"\n")
+    bump = "UPDATE batches SET received = received + 1 WHERE id = ?"
+    with _db_lock, _db:
+        updated = _db.execute(bump, (batch_id,)).rowcount
+    if not updated and _import_legacy_status(batch_id):
+        # Batch still in flight from before the metadata DB; count against the imported row
+        with _db_lock, _db:
+            _db.execute(bump, (batch_id,))
+    with _db_lock:
+        row = _db.execute("SELECT received, expected FROM batches WHERE id = ?", (batch_id,)).fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def completed_requests(batch_id: str) -> set[str]:
+    p = BATCHES_DIR / batch_id / "completed.log"
+    if not p.exists():
+        return set()
+    return set(p.read_text().split())
+
+
+def list_batch_ids() -> list[str]:
+    with _db_lock:
+        ids = {r[0] for r in _db.execute("SELECT id FROM batches")}
+    ids.update(p.parent.name for p in BATCHES_DIR.glob("*/status.json"))
+    return sorted(ids)
+
+
+def map_request_to_batch(request_id: str, batch_id: str) -> None:
+    map_requests_to_batch_bulk([(request_id, batch_id)])
+
+
+def map_requests_to_batch_bulk(pairs: Iterable[Tuple[str, str]]) -> None:
+    """Record many request->batch mappings in a single transaction."""
+    with _db_lock, _db:
+        _db.executemany(
+            "INSERT OR IGNORE INTO request_map (rid, batch_id) VALUES (?, ?)",
+            ((str(rid), bid) for rid, bid in pairs),
+        )
 
 
 def find_batch_by_request(request_id: str) -> str | None:
+    with _db_lock:
+        row = _db.execute(
+            "SELECT batch_id FROM request_map WHERE rid = ?", (str(request_id),)
+        ).fetchone()
+    if row:
+        return row[0]
+    # Mappings created before the metadata DB were one file per request id
     p = REQUESTS_DIR / f"{request_id}.txt"
     return p.read_text().strip() if p.exists() else None
 
 
-def append_results_json(batch_id: str, request_id: str, payload: Any) -> Path:
+def append_results_jsonl(batch_id: str, request_id: str, payload: Any) -> Path:
+    """Append one raw callback payload as a line to results.jsonl (no re-read/rewrite)."""
     d = batch_dir(batch_id)
-    p = d / "results.json"
-    data: dict[str, Any] = {}
-    if p.exists():
-        data = json.loads(p.read_text() or "{}")
-    data.setdefault(request_id, payload)
-    p.write_text(json.dumps(data, ensure_ascii=False, indent=2))
+    p = d / "results.jsonl"
+    line = orjson.dumps({"rid": str(request_id), "payload": payload}, option=orjson.OPT_APPEND_NEWLINE)
+    with p.open("ab") as f:
+        f.write(line)
     return p
 
 
-def append_results_csv(batch_id: str, rows: Iterable[dict[str, Any]]) -> Path:
-    import csv
+# Open results.csv handles kept across callbacks, keyed by batch_id
+_csv_writers: dict[str, tuple[TextIO, csv.DictWriter]] = {}
+_csv_lock = threading.Lock()
 
-    d = batch_dir(batch_id)
-    p = d / "results.csv"
+
+def _get_csv_writer(batch_id: str) -> tuple[TextIO, csv.DictWriter]:
+    entry = _csv_writers.get(batch_id)
+    if entry is None:
+        p = batch_dir(batch_id) / "results.csv"
+        f = p.open("a", encoding="utf-8", newline="", buffering=1 << 16)
+        w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        if f.tell() == 0:
+            w.writeheader()
+        entry = _csv_writers[batch_id] = (f, w)
+    return entry
+
+
+def append_results_csv(batch_id: str, rows: Iterable[dict[str, Any]]) -> Path:
+    """Append rows to the batch's results.csv through its cached writer."""
+    p = batch_dir(batch_id) / "results.csv"
     rows = list(rows)
     if not rows:
         return p
-    fieldnames = list(rows[0].keys())
-    exists = p.exists()
-    with p.open("a", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        if not exists:
-            w.writeheader()
-        for r in rows:
-            w.writerow(r)
+    with _csv_lock:
+        f, w = _get_csv_writer(batch_id)
+        w.writerows(rows)
+        # Keep the file current on disk for readers (merge tools, /download)
+        f.flush()
     return p
 
 
+def close_results_csv(batch_id: str) -> None:
+    with _csv_lock:
+        entry = _csv_writers.pop(batch_id, None)
+        if entry is not None:
+            entry[0].close()
+
+
+@atexit.register
+def close_all_results_csv() -> None:
+    with _csv_lock:
+        while _csv_writers:
+            _, (f, _) = _csv_writers.popitem()
+            f.close()
+
+
 def batch_csv_path(batch_id: str) -> Path:
     return batch_dir(batch_id) / "results.csv"